@@ -1,101 +1,143 @@
 # backend/app/api/routes.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from fastapi.responses import JSONResponse
-from ..core.scanner import NetworkScanner
+from fastapi.responses import ORJSONResponse, Response
+from ..core.scanner_factory import create_network_scanner
+from ..utils.helpers import compute_device_delta
 import asyncio
-import json
 import logging
+import orjson
 
 # ロガーの設定
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-scanner = NetworkScanner()
+# 環境に適したスキャナー（通常は強化版）を1つだけ生成し、main.pyと共有する
+scanner = create_network_scanner()
 
-# 接続されているWebSocketクライアントを管理
-connected_clients = set()
+# クライアントごとの送信キューの最大長（溢れた場合はスナップショットを送り直す）
+CLIENT_QUEUE_SIZE = 4
+
+# 接続されているWebSocketクライアントを管理（websocket -> 送信キュー）
+connected_clients = {}
+
+# 最後にブロードキャストした時点のデバイス情報（差分計算の基準）
+_last_snapshot = None
 
 @router.get("/devices")
 async def get_devices():
     """スキャンされたデバイスのリストを取得"""
-    devices = scanner.get_devices()
-    return [device.dict() for device in devices]
+    return Response(content=scanner.get_devices_json_cached(), media_type="application/json")
 
 @router.post("/scan")
 async def scan_network(ip_range: str = Query("192.168.1.0/24")):
     """ネットワークスキャンを手動で実行"""
     try:
-        scanner.scan_network(ip_range)
-        return {"status": "scan_completed", "ip_range": ip_range}
+        await scanner.async_scan_network(ip_range)
+        return ORJSONResponse({"status": "scan_completed", "ip_range": ip_range})
+    except ValueError as e:
+        logger.error(f"Invalid scan range: {e}")
+        return ORJSONResponse(
+            status_code=400, 
+            content={"status": "error", "message": str(e)}
+        )
     except Exception as e:
         logger.error(f"Scan error: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500, 
             content={"status": "error", "message": str(e)}
         )
 
+def _dumps(message):
+    """メッセージをJSONにシリアライズ（Deviceはpydanticでdictに変換）"""
+    return orjson.dumps(message, default=lambda device: device.model_dump(mode="json"))
+
+def _current_snapshot():
+    """クライアントに配信済みの状態を表すスナップショットを返す"""
+    global _last_snapshot
+    if _last_snapshot is None:
+        _last_snapshot = scanner.get_devices_snapshot()
+    return _last_snapshot
+
+def _send_snapshot(queue):
+    """未送信のメッセージを破棄し、デバイス全体のスナップショットを送信キューに入れる"""
+    payload = _dumps({"op": "snapshot", "devices": list(_current_snapshot().values())})
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(payload)
+
+async def _sender(websocket, queue):
+    """クライアントごとの送信タスク - キューのメッセージを順に送信"""
+    try:
+        while True:
+            payload = await queue.get()
+            await websocket.send_bytes(payload)
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected normally")
+    except Exception as e:
+        logger.error(f"Error sending to client: {e}")
+        # 送信できなくなった接続を閉じ、エンドポイントの受信待ちを終了させる
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        # 送信できなくなったクライアントはブロードキャスト対象から外す
+        connected_clients.pop(websocket, None)
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocketエンドポイント - リアルタイム更新用"""
+    """WebSocketエンドポイント - リアルタイム更新用（サーバーからのプッシュ専用）"""
     await websocket.accept()
     logger.info("WebSocket client connected")
-    connected_clients.add(websocket)
+    
+    queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    sender_task = asyncio.create_task(_sender(websocket, queue))
+    connected_clients[websocket] = queue
     
     try:
-        # 接続時に最初のデータを送信
-        devices = scanner.get_devices()
-        await websocket.send_json([device.dict() for device in devices])
+        # 接続時に最初のデータとしてスナップショットを送信
+        _send_snapshot(queue)
         
-        # クライアントからのメッセージを待機
+        # 切断されるまで受信を続ける（クライアントからのメッセージは処理しない）
         while True:
-            try:
-                message = await websocket.receive_text()
-                logger.info(f"WebSocket message received: {message}")
-                
-                # メッセージに応じて処理
-                if message == "get_devices":
-                    devices = scanner.get_devices()
-                    await websocket.send_json([device.dict() for device in devices])
-            except WebSocketDisconnect:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
                 logger.info("WebSocket disconnected normally")
                 break
-            except Exception as e:
-                logger.error(f"WebSocket error: {e}")
-                break
     except Exception as e:
         logger.error(f"WebSocket unhandled exception: {e}")
     finally:
-        # 常に接続リストから削除
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
+        # 常に接続リストから削除し、送信タスクを停止
+        connected_clients.pop(websocket, None)
+        sender_task.cancel()
         logger.info("WebSocket client removed from connected clients")
 
 async def broadcast_devices():
-    """すべての接続クライアントにデバイス情報をブロードキャスト"""
+    """すべての接続クライアントにデバイス情報の差分をブロードキャスト"""
+    global _last_snapshot
     while True:
         try:
             await asyncio.sleep(5)  # 最初に待機して、初期化完了を確認
             
-            if not connected_clients:
+            # 前回の配信からの差分を計算
+            new_snapshot = scanner.get_devices_snapshot()
+            delta = compute_device_delta(_current_snapshot(), new_snapshot)
+            _last_snapshot = new_snapshot
+            
+            if not connected_clients or delta is None:
                 continue
-                
-            devices = scanner.get_devices()
-            devices_json = [device.dict() for device in devices]
             
-            # すべてのクライアントに送信
-            disconnected_clients = []
-            for client in connected_clients:
-                try:
-                    await client.send_json(devices_json)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to client: {e}")
-                    disconnected_clients.append(client)
+            payload = _dumps({"op": "delta", **delta})
             
-            # 切断されたクライアントを削除
-            for client in disconnected_clients:
-                if client in connected_clients:
-                    connected_clients.remove(client)
+            # 各クライアントのキューに追加するだけで、実際の送信は各送信タスクが行う
+            # （遅いクライアントが他のクライアントやこのループを遅らせない）
+            for queue in connected_clients.values():
+                try:
+                    queue.put_nowait(payload)
+                except asyncio.QueueFull:
+                    # 差分を取りこぼすと状態がずれるため、スナップショットで送り直す
+                    _send_snapshot(queue)
         except Exception as e:
             logger.error(f"Broadcast error: {e}")
-            await asyncio.sleep(5)  # エラーが続く場合も少し待機
\ No newline at end of file
+            await asyncio.sleep(5)  # エラーが続く場合も少し待機
@@ -0,0 +1,36 @@
+# backend/app/core/device_cache.py
+from ..models.device import DeviceListAdapter
+
+
+class DeviceCacheMixin:
+    """スキャン結果をロック無しで読める不変のスナップショットとして公開する共通処理"""
+    
+    def _init_device_cache(self):
+        """スナップショットとキャッシュを初期化"""
+        # 読み取り側がロック無しで参照できるよう、スキャンごとに差し替える不変のタプル
+        self._devices_snapshot = ()
+        self._snapshot = {}
+        self._cache_json = b"[]"
+    
+    def _publish_devices(self, devices):
+        """スキャン結果をスナップショットとして公開（lockを保持した状態で呼び出す）
+        
+        公開したDeviceは以後変更しないこと（読み取り側と共有される）
+        """
+        snapshot = tuple(devices)
+        # pydantic-coreで一度だけシリアライズ（差分計算用の辞書はDeviceをそのまま保持）
+        self._cache_json = DeviceListAdapter.dump_json(list(snapshot))
+        self._snapshot = {device.ip: device for device in snapshot}
+        self._devices_snapshot = snapshot
+    
+    def get_devices(self):
+        """スキャンされたデバイスのリストを返す（ロック不要の不変スナップショット）"""
+        return self._devices_snapshot
+    
+    def get_devices_json_cached(self):
+        """シリアライズ済みのデバイスリストを返す（スキャン完了ごとに更新される）"""
+        return self._cache_json
+    
+    def get_devices_snapshot(self):
+        """IPアドレスをキーにしたDeviceの辞書を返す（差分計算用）"""
+        return self._snapshot
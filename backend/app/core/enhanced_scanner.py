@@ -1,6 +1,10 @@
 # backend/app/core/enhanced_scanner.py
+import asyncio
+import ipaddress
 import subprocess
 import socket
+import struct
+import os
 import time
 import threading
 import re
@@ -8,17 +12,142 @@ import logging
 import concurrent.futures
 import platform
 from ..models.device import Device
+from .device_cache import DeviceCacheMixin
+
+try:
+    import uvloop
+except ImportError:  # Windowsなどuvloopが使えない環境
+    uvloop = None
 
 logger = logging.getLogger(__name__)
 
-class EnhancedNetworkScanner:
+# 一般的なメーカーのOUIプレフィックス
+OUI_DICT = {
+    "00:0c:29": "VMware",
+    "00:50:56": "VMware",
+    "ac:de:48": "Apple",
+    "b8:27:eb": "Raspberry Pi",
+    "dc:a6:32": "Raspberry Pi",
+    "00:25:90": "Cisco",
+    "00:16:3e": "Xen",
+    "f8:1a:67": "TP-Link",
+    "00:11:32": "Synology",
+    "74:da:38": "Edimax",
+    "00:21:29": "Cisco-Linksys",
+    "f0:9f:c2": "Ubiquiti",
+    "3c:7c:3f": "Huawei",
+    "2c:54:cf": "LG Electronics",
+    "40:b0:76": "ASUSTek",
+    "00:e0:4c": "REALTEK",
+    "94:10:3e": "Belkin",
+    "18:b4:30": "Nest",
+    "fc:fc:48": "Apple",
+    "a8:8e:24": "Apple",
+    "70:4d:7b": "Apple",
+    "58:40:4e": "Apple",
+    "ac:bc:32": "Apple",
+    "fe:c4:e5": "Samsung",
+    "18:67:b0": "Samsung"
+}
+
+# OUIを24ビット整数に変換したルックアップテーブル
+_OUI_TABLE = {int(k.replace(":", ""), 16): v for k, v in OUI_DICT.items()}
+
+# 正規表現はモジュール読み込み時に一度だけコンパイル
+_IPV4_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
+_MAC_RE = re.compile(r'([0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5})')
+_GATEWAY_LINUX_RE = re.compile(r'default via (\d+\.\d+\.\d+\.\d+)')
+
+# ARPテーブルの1行からIPアドレスとMACアドレスを抽出
+_ARP_ENTRY_RE = re.compile(_IPV4_RE.pattern + r'\D.*?' + _MAC_RE.pattern)
+
+# 共有スレッドプールのワーカー数
+SCAN_POOL_WORKERS = 64
+
+# ホスト名キャッシュの有効期間と逆引きのタイムアウト（秒）
+HOSTNAME_CACHE_TTL = 300
+HOSTNAME_LOOKUP_TIMEOUT = 1.0
+
+# ICMPエコーの定数
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+PING_TIMEOUT = 1.0
+PING_PAYLOAD = b"linkscope"
+
+# pingコマンドで代替する場合の同時実行数
+PING_COMMAND_CONCURRENCY = 50
+
+# ポートスキャンで同時にスキャンするホスト数
+PORT_SCAN_CONCURRENCY = 32
+
+# SYNスキャンの応答待ちタイムアウト（秒）
+SYN_SCAN_TIMEOUT = 1
+
+# 一度にスキャンできる最大アドレス数（/20相当）
+MAX_SCAN_ADDRESSES = 4096
+
+# ポートスキャンの接続待ちタイムアウト（秒）
+PORT_SCAN_TIMEOUT = 0.2
+
+def _icmp_checksum(data):
+    """ICMPチェックサムを計算"""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def _build_echo_request(ident, seq):
+    """ICMPエコーリクエストパケットを作成"""
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _icmp_checksum(header + PING_PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + PING_PAYLOAD
+
+def _check_output_blocking(args):
+    """外部コマンドを同期的に実行して標準出力を返す"""
+    return subprocess.check_output(args, stderr=subprocess.DEVNULL).decode(errors="ignore")
+
+def _call_blocking(args):
+    """外部コマンドを同期的に実行して終了コードを返す"""
+    return subprocess.call(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def _release_after_lookup(semaphore, future):
+    """逆引きの完了時にセマフォを解放"""
+    semaphore.release()
+    if not future.cancelled():
+        # タイムアウト後に発生した例外が未取得として警告されないよう取得しておく
+        future.exception()
+
+def _run_coroutine(coro):
+    """同期コードからコルーチンを実行 (uvloopがあれば使用)"""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+class EnhancedNetworkScanner(DeviceCacheMixin):
     def __init__(self):
         self.devices = {}
         self.lock = threading.Lock()
         self.scanning = False
-        self.gateway_ip = self._get_default_gateway()
+        self._init_device_cache()
+        self._arp_cache = {}
+        self._hostname_cache = {}
+        self._hostname_cache_pruned_at = time.monotonic()
+        # スキャンごとにスレッドを作り直さないよう共有のスレッドプールを使用
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_POOL_WORKERS, thread_name_prefix="scan")
+        # ゲートウェイは最初のスキャン時に非同期で取得
+        self.gateway_ip = None
         self.is_wsl = self._check_if_wsl()
         
+    def _run_in_pool(self, func, *args):
+        """ブロッキング処理を共有スレッドプールで実行"""
+        return asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+    
+    def close(self):
+        """スレッドプールを終了"""
+        self._pool.shutdown(wait=False)
+    
     def _check_if_wsl(self):
         """WSL環境かどうかをチェック"""
         try:
@@ -27,20 +156,37 @@ class EnhancedNetworkScanner:
         except:
             return False
     
-    def _get_default_gateway(self):
+    async def _run_command(self, *args):
+        """外部コマンドを非同期で実行して標準出力を返す"""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except NotImplementedError:
+            # WindowsのSelectorEventLoopはサブプロセス非対応のためスレッドで実行
+            return await self._run_in_pool(_check_output_blocking, args)
+        
+        stdout, _ = await proc.communicate()
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, args)
+        return stdout.decode(errors="ignore")
+    
+    async def _get_default_gateway(self):
         """デフォルトゲートウェイを取得"""
         try:
             # Linuxの場合
-            result = subprocess.check_output("ip route | grep default", shell=True).decode()
-            gateway = re.search(r'default via (\d+\.\d+\.\d+\.\d+)', result).group(1)
+            result = await self._run_command("ip", "route", "show", "default")
+            gateway = _GATEWAY_LINUX_RE.search(result).group(1)
             return gateway
-        except:
+        except Exception:
             try:
                 # Windowsの場合
-                result = subprocess.check_output("ipconfig", shell=True).decode()
+                result = await self._run_command("ipconfig")
                 for line in result.split('\n'):
                     if 'Default Gateway' in line:
-                        gateway = re.search(r'(\d+\.\d+\.\d+\.\d+)', line).group(1)
+                        gateway = _IPV4_RE.search(line).group(1)
                         return gateway
             except Exception as e:
                 logger.error(f"デフォルトゲートウェイの取得に失敗: {e}")
@@ -51,77 +197,129 @@ class EnhancedNetworkScanner:
         if not mac:
             return None
             
-        # 一般的なメーカーのOUIプレフィックス
-        oui_dict = {
-            "00:0c:29": "VMware",
-            "00:50:56": "VMware",
-            "ac:de:48": "Apple",
-            "b8:27:eb": "Raspberry Pi",
-            "dc:a6:32": "Raspberry Pi",
-            "00:25:90": "Cisco",
-            "00:16:3e": "Xen",
-            "f8:1a:67": "TP-Link",
-            "00:11:32": "Synology",
-            "74:da:38": "Edimax",
-            "00:21:29": "Cisco-Linksys",
-            "f0:9f:c2": "Ubiquiti",
-            "3c:7c:3f": "Huawei",
-            "2c:54:cf": "LG Electronics",
-            "40:b0:76": "ASUSTek",
-            "00:e0:4c": "REALTEK",
-            "94:10:3e": "Belkin",
-            "18:b4:30": "Nest",
-            "fc:fc:48": "Apple",
-            "a8:8e:24": "Apple",
-            "70:4d:7b": "Apple",
-            "58:40:4e": "Apple",
-            "ac:bc:32": "Apple",
-            "fe:c4:e5": "Samsung",
-            "18:67:b0": "Samsung"
-        }
-        
-        mac_prefix = mac[:8].lower()
-        return oui_dict.get(mac_prefix, None)
+        try:
+            oui = int(mac[:8].replace(":", "").replace("-", ""), 16)
+        except ValueError:
+            return None
+        return _OUI_TABLE.get(oui)
     
     def _parse_ip_range(self, ip_range):
-        """IPレンジをパース"""
-        if '/' in ip_range:
-            base_ip, cidr = ip_range.split('/')
-            ip_parts = base_ip.split('.')
-            
-            # サブネットマスクの計算は簡易化
-            base_network = '.'.join(ip_parts[:3])
-            return base_network, int(cidr)
-        else:
-            # 単一IPまたは形式が異なる場合
-            ip_parts = ip_range.split('.')
-            base_network = '.'.join(ip_parts[:3])
-            return base_network, 24  # デフォルトは/24
+        """IPレンジをパースしてネットワークを返す"""
+        # プレフィックス長が無い場合は/24として扱う
+        if '/' not in ip_range:
+            ip_range = f"{ip_range}/24"
+        
+        network = ipaddress.ip_network(ip_range, strict=False)
+        if network.version != 4:
+            raise ValueError(f"IPv4のレンジのみスキャンできます: {ip_range}")
+        if network.num_addresses > MAX_SCAN_ADDRESSES:
+            raise ValueError(f"スキャン範囲が広すぎます: {ip_range} (最大{MAX_SCAN_ADDRESSES}アドレス)")
+        return network
     
-    def _ping_scan(self, base_network):
-        """pingを使った簡易スキャン"""
-        active_ips = []
+    async def _ping_scan(self, network):
+        """ICMPエコーを使った簡易スキャン"""
+        ips = [str(host) for host in network.hosts()]
         
-        # 複数のIPを並列でスキャン
-        with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-            future_to_ip = {}
-            
-            for i in range(1, 255):
-                ip = f"{base_network}.{i}"
-                future = executor.submit(self._ping_single_host, ip)
-                future_to_ip[future] = ip
-            
-            for future in concurrent.futures.as_completed(future_to_ip):
-                ip = future_to_ip[future]
+        try:
+            sock = self._open_icmp_socket()
+        except OSError as e:
+            # ICMPソケットが使えない環境ではpingコマンドで代替
+            logger.warning(f"ICMPソケットを作成できないためpingコマンドを使用します: {e}")
+            return await self._ping_scan_with_command(ips)
+        
+        with sock:
+            try:
+                return await self._async_ping_scan(sock, ips)
+            except NotImplementedError:
+                # WindowsのProactorEventLoopはadd_readerに対応していない
+                logger.warning("イベントループがソケットの監視に対応していないためpingコマンドを使用します")
+        
+        return await self._ping_scan_with_command(ips)
+    
+    def _open_icmp_socket(self):
+        """ICMPソケットを作成 (非特権のDGRAMを優先し、使えなければRAW)"""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        except OSError:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        return sock
+    
+    async def _async_ping_scan(self, sock, ips):
+        """1つのソケットで全ホストにICMPエコーを送り、応答を並行して待機"""
+        loop = asyncio.get_running_loop()
+        pending = {}
+        
+        def on_readable():
+            # 受信した応答をシーケンス番号で待機中のfutureに振り分ける
+            while True:
                 try:
-                    if future.result():
-                        active_ips.append(ip)
-                except Exception as e:
-                    logger.error(f"Error pinging {ip}: {e}")
+                    data, addr = sock.recvfrom(1024)
+                except (BlockingIOError, InterruptedError):
+                    return
+                except OSError as e:
+                    logger.debug(f"ICMP受信エラー: {e}")
+                    return
+                
+                # RAWソケットではIPヘッダが先頭に付く
+                if data and data[0] >> 4 == 4:
+                    data = data[(data[0] & 0x0F) * 4:]
+                if len(data) < 8:
+                    continue
+                
+                icmp_type, _, _, _, seq = struct.unpack("!BBHHH", data[:8])
+                if icmp_type != ICMP_ECHO_REPLY or seq not in pending:
+                    continue
+                
+                ip, future = pending[seq]
+                if addr[0] == ip and not future.done():
+                    future.set_result(True)
+        
+        loop.add_reader(sock.fileno(), on_readable)
+        try:
+            results = await asyncio.gather(*[
+                self._async_ping(sock, pending, ip, seq)
+                for seq, ip in enumerate(ips, start=1)
+            ])
+        finally:
+            loop.remove_reader(sock.fileno())
+        
+        return [ip for ip, alive in zip(ips, results) if alive]
+    
+    async def _async_ping(self, sock, pending, ip, seq):
+        """単一ホストにICMPエコーを送信して応答を待機"""
+        # DGRAMソケットではカーネルが識別子を書き換えるため、シーケンス番号で照合する
+        seq &= 0xFFFF
+        future = asyncio.get_running_loop().create_future()
+        pending[seq] = (ip, future)
+        
+        try:
+            sock.sendto(_build_echo_request(os.getpid() & 0xFFFF, seq), (ip, 0))
+            return await asyncio.wait_for(future, PING_TIMEOUT)
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            pending.pop(seq, None)
+    
+    async def _ping_scan_with_command(self, ips):
+        """pingコマンドを使った簡易スキャン (ICMPソケットが使えない場合)"""
+        # 同時に起動するpingプロセス数を制限して並列にスキャン
+        semaphore = asyncio.Semaphore(PING_COMMAND_CONCURRENCY)
+        results = await asyncio.gather(
+            *[self._ping_single_host(ip, semaphore) for ip in ips],
+            return_exceptions=True
+        )
+        
+        active_ips = []
+        for ip, result in zip(ips, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error pinging {ip}: {result}")
+            elif result:
+                active_ips.append(ip)
         
         return active_ips
     
-    def _ping_single_host(self, ip):
+    async def _ping_single_host(self, ip, semaphore):
         """単一ホストにpingを送信"""
         # OSに応じてコマンドを調整
         if platform.system() == "Windows":
@@ -129,74 +327,201 @@ class EnhancedNetworkScanner:
         else:  # Linux/Unix/WSL
             ping_cmd = ["ping", "-c", "1", "-W", "1", ip]
         
-        try:
-            result = subprocess.run(ping_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return result.returncode == 0
-        except:
-            return False
-    
-    def _port_scan(self, ip, ports=[80, 443, 22, 8080, 5000]):
-        """基本的なポートスキャン"""
-        open_ports = []
-        for port in ports:
+        async with semaphore:
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(0.1)
-                result = sock.connect_ex((ip, port))
-                if result == 0:
-                    open_ports.append(port)
+                proc = await asyncio.create_subprocess_exec(
+                    *ping_cmd,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                return await proc.wait() == 0
+            except NotImplementedError:
+                # WindowsのSelectorEventLoopはサブプロセス非対応のためスレッドで実行
+                try:
+                    return await self._run_in_pool(_call_blocking, ping_cmd) == 0
+                except OSError:
+                    return False
+            except OSError:
+                return False
+    
+    async def _port_scan(self, ip, ports=[80, 443, 22, 8080, 5000]):
+        """基本的なポートスキャン（全ポートへ同時に非ブロッキング接続）"""
+        loop = asyncio.get_running_loop()
+        sockets = []
+        
+        async def try_connect(port):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sockets.append(sock)
+            await loop.sock_connect(sock, (ip, port))
+            return port
+        
+        tasks = [asyncio.ensure_future(try_connect(port)) for port in ports]
+        try:
+            # 待ち時間はポート数に関係なく最大でもタイムアウト1回分
+            done, pending = await asyncio.wait(tasks, timeout=PORT_SCAN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            for sock in sockets:
                 sock.close()
-            except:
-                pass
+        
+        open_ports = [task.result() for task in done if task.exception() is None]
         return len(open_ports) > 0, open_ports
     
-    def _get_mac_address(self, ip):
-        """ARPテーブルからMACアドレスを取得"""
+    async def _port_scan_hosts(self, ips, ports):
+        """複数のIPを並列でポートスキャンし、IPごとの開いているポートを返す"""
+        # 同時にスキャンするホスト数を制限（広いレンジでのファイルディスクリプタ枯渇を防ぐ）
+        semaphore = asyncio.Semaphore(PORT_SCAN_CONCURRENCY)
+        
+        async def guarded_port_scan(ip):
+            async with semaphore:
+                return await self._port_scan(ip, ports)
+        
+        results = await asyncio.gather(
+            *[guarded_port_scan(ip) for ip in ips],
+            return_exceptions=True
+        )
+        
+        open_ports_by_ip = {}
+        for ip, result in zip(ips, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error port scanning {ip}: {result}")
+            else:
+                open_ports_by_ip[ip] = result[1]
+        
+        return open_ports_by_ip
+    
+    def _syn_scan(self, ips, ports):
+        """全IP・ポートにSYNパケットを一括送信し、SYN/ACKを返したIPを返す（root権限が必要）"""
+        # scapyは読み込みが重いため、root権限で実際に使うときだけスレッドプール上でインポート
+        import scapy.all as scapy
+        
+        packets = [
+            scapy.IP(dst=ip) / scapy.TCP(dport=port, flags="S")
+            for ip in ips
+            for port in ports
+        ]
+        answered, _ = scapy.sr(packets, timeout=SYN_SCAN_TIMEOUT, verbose=False)
+        
+        active_ips = set()
+        for _, received in answered:
+            # SYN(0x02)とACK(0x10)が両方立っている応答のみ
+            if received.haslayer(scapy.TCP) and int(received[scapy.TCP].flags) & 0x12 == 0x12:
+                active_ips.add(received[scapy.IP].src)
+        return active_ips
+    
+    async def _find_active_hosts(self, ips, ports):
+        """指定したIPのうち、いずれかのポートが応答するホストを返す"""
+        # scapyとroot権限があればSYNスキャンで一度に検出
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            try:
+                active_ips = await self._run_in_pool(self._syn_scan, ips, ports)
+                return [ip for ip in ips if ip in active_ips]
+            except Exception as e:
+                # scapyが無い場合（ImportError）もここで接続スキャンに切り替える
+                logger.debug(f"SYNスキャンに失敗したため接続スキャンで代替: {e}")
+        
+        # 使えない場合は通常の接続によるポートスキャンを並列で実行
+        open_ports_by_ip = await self._port_scan_hosts(ips, ports)
+        return [ip for ip in ips if open_ports_by_ip.get(ip)]
+    
+    async def _refresh_arp_cache(self):
+        """ARPテーブルを一括取得してキャッシュ"""
         try:
             if platform.system() == "Windows":
-                arp_output = subprocess.check_output(f"arp -a {ip}", shell=True).decode()
+                arp_output = await self._run_command("arp", "-a")
             else:
-                arp_output = subprocess.check_output(f"arp -n {ip}", shell=True).decode()
-            
-            # MACアドレスを抽出
-            mac_pattern = r'([0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2})'
-            match = re.search(mac_pattern, arp_output, re.IGNORECASE)
-            if match:
-                return match.group(1).lower()
+                try:
+                    arp_output = await self._run_command("ip", "neigh", "show")
+                except FileNotFoundError:
+                    arp_output = await self._run_command("arp", "-an")
         except Exception as e:
-            logger.debug(f"MACアドレス取得エラー ({ip}): {e}")
+            logger.debug(f"ARPテーブル取得エラー: {e}")
+            return
         
-        return "00:00:00:00:00:00"
+        arp_cache = {}
+        for line in arp_output.splitlines():
+            match = _ARP_ENTRY_RE.search(line)
+            if match:
+                arp_cache[match.group(1)] = match.group(2).lower().replace("-", ":")
+        self._arp_cache = arp_cache
+    
+    def _get_mac_address(self, ip):
+        """キャッシュ済みのARPテーブルからMACアドレスを取得"""
+        return self._arp_cache.get(ip, "00:00:00:00:00:00")
     
-    def _get_hostname(self, ip):
-        """IPアドレスからホスト名を解決"""
+    async def _get_hostname(self, ip, semaphore):
+        """IPアドレスからホスト名を解決（失敗も含めて一定時間キャッシュ）"""
+        cached = self._hostname_cache.get(ip)
+        if cached is not None and time.monotonic() - cached[1] < HOSTNAME_CACHE_TTL:
+            return cached[0]
+        
+        # 実行中の逆引きをスレッドプールのワーカー数までに制限し、
+        # タイムアウトにキューでの待ち時間が含まれないようにする
+        await semaphore.acquire()
         try:
-            hostname = socket.gethostbyaddr(ip)[0]
-            return hostname
-        except:
-            return None
+            now = time.monotonic()
+            lookup = self._run_in_pool(socket.getnameinfo, (ip, 0), socket.NI_NAMEREQD)
+        except BaseException:
+            # スレッドプールが終了済みなどで投入できなかった場合は枠をすぐに返す
+            semaphore.release()
+            raise
+        # タイムアウト後もワーカーは逆引きを続けるため、完了するまで枠を解放しない
+        lookup.add_done_callback(lambda future: _release_after_lookup(semaphore, future))
+        
+        try:
+            # PTRレコードが無いホストで長時間待たないようタイムアウトを設定
+            hostname, _ = await asyncio.wait_for(asyncio.shield(lookup), HOSTNAME_LOOKUP_TIMEOUT)
+        except (asyncio.TimeoutError, OSError):
+            hostname = None
+        
+        self._store_hostname(ip, hostname, now)
+        return hostname
+    
+    def _store_hostname(self, ip, hostname, now):
+        """ホスト名をキャッシュに保存（期限切れのエントリはTTLごとにまとめて削除）"""
+        if now - self._hostname_cache_pruned_at >= HOSTNAME_CACHE_TTL:
+            self._hostname_cache = {
+                cached_ip: entry for cached_ip, entry in self._hostname_cache.items()
+                if now - entry[1] < HOSTNAME_CACHE_TTL
+            }
+            self._hostname_cache_pruned_at = now
+        self._hostname_cache[ip] = (hostname, now)
     
     def scan_network(self, ip_range="192.168.1.0/24"):
         """指定したIP範囲をスキャン (強化版)"""
+        try:
+            _run_coroutine(self.async_scan_network(ip_range))
+        except ValueError as e:
+            # 同期呼び出し（定期スキャンのスレッド）では例外を伝播させずにログに残す
+            logger.error(f"スキャン範囲が不正です: {e}")
+    
+    async def async_scan_network(self, ip_range="192.168.1.0/24"):
+        """指定したIP範囲を非同期でスキャン (強化版)"""
         if self.scanning:
             return
+        
+        # IPレンジを解析（不正な範囲は呼び出し元にValueErrorを返す）
+        network = self._parse_ip_range(ip_range)
             
         self.scanning = True
         logger.info(f"ネットワークスキャン開始: {ip_range}")
         
         try:
-            # IPレンジを解析
-            base_network, cidr = self._parse_ip_range(ip_range)
-            logger.info(f"スキャン範囲: {base_network}.0/{cidr}")
+            logger.info(f"スキャン範囲: {network}")
             
-            # 既存デバイスの接続情報を保持
-            with self.lock:
-                old_connections = {}
-                for ip, device in self.devices.items():
-                    old_connections[ip] = device.connected_to
+            if self.gateway_ip is None:
+                self.gateway_ip = await self._get_default_gateway()
+            
+            # 既存デバイスの接続情報を保持（スナップショットからロック無しで取得）
+            old_connections = {
+                device.ip: device.connected_to for device in self._devices_snapshot
+            }
             
             # 検出方法1: pingスキャン
-            live_ips = self._ping_scan(base_network)
+            live_ips = await self._ping_scan(network)
             logger.info(f"Pingスキャンで {len(live_ips)} 台のデバイスを検出")
             
             # 検出方法2: 追加のポートスキャン
@@ -207,50 +532,38 @@ class EnhancedNetworkScanner:
             additional_ranges = []
             
             # スマートホームデバイスによく使われるIPの末尾
-            if cidr <= 24:  # /24以下のネットワークに対してのみ実行
+            if network.prefixlen <= 24:  # /24以下のネットワークに対してのみ実行
+                base_address = int(network.network_address)
                 special_suffixes = [100, 101, 102, 200, 201, 1, 2, 3, 4, 10, 20, 30, 50]
                 for suffix in special_suffixes:
-                    ip = f"{base_network}.{suffix}"
+                    ip = str(ipaddress.ip_address(base_address + suffix))
                     if ip not in live_ips:
                         additional_ranges.append(ip)
             
             # 追加のIPをスキャン
-            with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                future_to_ip = {}
-                for ip in additional_ranges:
-                    future = executor.submit(self._port_scan, ip, common_iot_ports)
-                    future_to_ip[future] = ip
-                
-                for future in concurrent.futures.as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    try:
-                        is_active, open_ports = future.result()
-                        if is_active and ip not in live_ips:
-                            additional_devices.append(ip)
-                            logger.info(f"ポートスキャンで追加デバイスを検出: {ip} (ポート: {open_ports})")
-                    except Exception as e:
-                        logger.error(f"Error port scanning {ip}: {e}")
+            port_scan_results = await self._port_scan_hosts(additional_ranges, common_iot_ports)
+            for ip, open_ports in port_scan_results.items():
+                if open_ports and ip not in live_ips:
+                    additional_devices.append(ip)
+                    logger.info(f"ポートスキャンで追加デバイスを検出: {ip} (ポート: {open_ports})")
             
             # すべての活性IPをマージ
             all_active_ips = list(set(live_ips + additional_devices))
             
+            # pingとポートスキャンで更新されたARPテーブルを一括取得
+            await self._refresh_arp_cache()
+            
+            # ホスト名の逆引きを並行して実行
+            hostname_semaphore = asyncio.Semaphore(SCAN_POOL_WORKERS)
+            hostnames = await asyncio.gather(*[
+                self._get_hostname(ip, hostname_semaphore) for ip in all_active_ips
+            ])
+            
             # デバイス情報を収集
             new_devices = {}
-            for ip in all_active_ips:
+            for ip, hostname in zip(all_active_ips, hostnames):
                 # MACアドレスを取得（ARPテーブルから）
-                # まずpingを送信してARPキャッシュを更新
-                try:
-                    subprocess.run(
-                        ["ping", "-c" if platform.system() != "Windows" else "-n", "1", ip], 
-                        stdout=subprocess.DEVNULL, 
-                        stderr=subprocess.DEVNULL,
-                        timeout=1
-                    )
-                except:
-                    pass
-                
                 mac = self._get_mac_address(ip)
-                hostname = self._get_hostname(ip)
                 manufacturer = self.get_manufacturer(mac)
                 is_gateway = (ip == self.gateway_ip)
                 
@@ -298,19 +611,24 @@ class EnhancedNetworkScanner:
                     if host_ip not in new_devices:
                         host_candidates.append(host_ip)
                 
-                # 候補をスキャン
-                for ip in host_candidates:
-                    is_active, _ = self._port_scan(ip)
-                    if is_active:
-                        mac = self._get_mac_address(ip) or "00:00:00:00:00:00"
-                        new_devices[ip] = Device(
-                            ip=ip,
-                            mac=mac,
-                            manufacturer=self.get_manufacturer(mac),
-                            hostname="Windows Host",
-                            is_gateway=False,
-                            connected_to=[self.gateway_ip]
-                        )
+                # 候補のIPとポートにまとめてSYNを送信してアクティブなホストを検出
+                host_ports = [80, 443, 22, 8080, 5000]
+                active_hosts = await self._find_active_hosts(host_candidates, host_ports)
+                
+                # 新たに検出したホストのMACアドレスを取得するためARPテーブルを再取得
+                if active_hosts:
+                    await self._refresh_arp_cache()
+                
+                for ip in active_hosts:
+                    mac = self._get_mac_address(ip) or "00:00:00:00:00:00"
+                    new_devices[ip] = Device(
+                        ip=ip,
+                        mac=mac,
+                        manufacturer=self.get_manufacturer(mac),
+                        hostname="Windows Host",
+                        is_gateway=False,
+                        connected_to=[self.gateway_ip]
+                    )
             
             # デバイスリストを更新
             with self.lock:
@@ -318,6 +636,7 @@ class EnhancedNetworkScanner:
                 
                 # トポロジー推定
                 self._estimate_topology()
+                self._publish_devices(self.devices.values())
             
             logger.info(f"スキャン完了: {len(self.devices)} 台のデバイスを検出")
         except Exception as e:
@@ -346,6 +665,9 @@ class EnhancedNetworkScanner:
     
     def start_periodic_scan(self, ip_range="192.168.1.0/24", interval=10):
         """定期的にネットワークスキャンを実行"""
+        # 不正な範囲はスレッドを起動する前に呼び出し元へValueErrorを返す
+        self._parse_ip_range(ip_range)
+        
         def scan_task():
             while True:
                 self.scan_network(ip_range)
@@ -354,8 +676,3 @@ class EnhancedNetworkScanner:
         thread = threading.Thread(target=scan_task, daemon=True)
         thread.start()
         logger.info(f"定期スキャンを開始しました (間隔: {interval}秒)")
-        
-    def get_devices(self):
-        """スキャンされたデバイスのリストを返す"""
-        with self.lock:
-            return list(self.devices.values())
\ No newline at end of file
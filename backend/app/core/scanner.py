@@ -1,4 +1,5 @@
 # backend/app/core/scanner.py
+import asyncio
 import scapy.all as scapy
 import socket
 import time
@@ -6,12 +7,32 @@ import threading
 import subprocess
 import re
 from ..models.device import Device
+from .device_cache import DeviceCacheMixin
 
-class NetworkScanner:
+# 簡易的なOUIテーブル（実際にはOUIデータベースを使用）
+OUI_DICT = {
+    "00:0c:29": "VMware",
+    "00:50:56": "VMware",
+    "ac:de:48": "Apple",
+    "b8:27:eb": "Raspberry Pi",
+    "dc:a6:32": "Raspberry Pi",
+    "00:25:90": "Cisco",
+    "00:16:3e": "Xen"
+}
+
+# OUIを24ビット整数に変換したルックアップテーブル
+_OUI_TABLE = {int(k.replace(":", ""), 16): v for k, v in OUI_DICT.items()}
+
+# 正規表現はモジュール読み込み時に一度だけコンパイル
+_IPV4_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
+_GATEWAY_LINUX_RE = re.compile(r'default via (\d+\.\d+\.\d+\.\d+)')
+
+class NetworkScanner(DeviceCacheMixin):
     def __init__(self):
         self.devices = {}
         self.lock = threading.Lock()
         self.scanning = False
+        self._init_device_cache()
         self.gateway_ip = self._get_default_gateway()
         
     def _get_default_gateway(self):
@@ -19,7 +40,7 @@ class NetworkScanner:
         try:
             # Linuxの場合
             result = subprocess.check_output("ip route | grep default", shell=True).decode()
-            gateway = re.search(r'default via (\d+\.\d+\.\d+\.\d+)', result).group(1)
+            gateway = _GATEWAY_LINUX_RE.search(result).group(1)
             return gateway
         except:
             try:
@@ -27,29 +48,21 @@ class NetworkScanner:
                 result = subprocess.check_output("ipconfig", shell=True).decode()
                 for line in result.split('\n'):
                     if 'Default Gateway' in line:
-                        gateway = re.search(r'(\d+\.\d+\.\d+\.\d+)', line).group(1)
+                        gateway = _IPV4_RE.search(line).group(1)
                         return gateway
             except:
                 return None
     
     def get_manufacturer(self, mac):
         """MACアドレスからメーカー情報を取得（実際にはより詳細なOUIデータベースを使用）"""
-        # 簡易的な実装（実際にはOUIデータベースを使用）
-        oui_dict = {
-            "00:0c:29": "VMware",
-            "00:50:56": "VMware",
-            "ac:de:48": "Apple",
-            "b8:27:eb": "Raspberry Pi",
-            "dc:a6:32": "Raspberry Pi",
-            "00:25:90": "Cisco",
-            "00:16:3e": "Xen"
-        }
-        
         if not mac:
             return None
             
-        mac_prefix = mac[:8].lower()
-        return oui_dict.get(mac_prefix, None)
+        try:
+            oui = int(mac[:8].replace(":", "").replace("-", ""), 16)
+        except ValueError:
+            return None
+        return _OUI_TABLE.get(oui)
     
     def scan_network(self, ip_range="192.168.1.0/24"):
         """指定したIP範囲をスキャン"""
@@ -65,48 +78,63 @@ class NetworkScanner:
             arp_request_broadcast = broadcast/arp_request
             answered_list = scapy.srp(arp_request_broadcast, timeout=3, verbose=False)[0]
             
-            with self.lock:
-                # 既存の接続情報を保持するための一時マップ
-                old_connections = {}
-                for ip, device in self.devices.items():
-                    old_connections[ip] = device.connected_to
+            # 既存の接続情報を保持するための一時マップ（スナップショットからロック無しで取得）
+            old_connections = {
+                device.ip: device.connected_to for device in self._devices_snapshot
+            }
+            
+            # デバイス情報の作成（ホスト名の逆引きで待つ間はロックを保持しない）
+            new_devices = {}
+            for element in answered_list:
+                ip = element[1].psrc
+                mac = element[1].hwsrc
+                
+                # ホスト名を取得（可能な場合）
+                hostname = None
+                try:
+                    hostname = socket.gethostbyaddr(ip)[0]
+                except:
+                    pass
                 
-                # デバイス情報の更新
-                for element in answered_list:
-                    ip = element[1].psrc
-                    mac = element[1].hwsrc
-                    
-                    # ホスト名を取得（可能な場合）
-                    hostname = None
-                    try:
-                        hostname = socket.gethostbyaddr(ip)[0]
-                    except:
-                        pass
-                    
-                    # メーカー情報の取得
-                    manufacturer = self.get_manufacturer(mac)
-                    
-                    # ゲートウェイかどうかを判定
-                    is_gateway = (ip == self.gateway_ip)
-                    
-                    # 接続情報を保持
-                    connected_to = old_connections.get(ip, [])
-                    
-                    # デバイス情報を更新
-                    self.devices[ip] = Device(
-                        ip=ip,
-                        mac=mac,
-                        manufacturer=manufacturer,
-                        hostname=hostname,
-                        is_gateway=is_gateway,
-                        connected_to=connected_to
-                    )
+                # メーカー情報の取得
+                manufacturer = self.get_manufacturer(mac)
+                
+                # ゲートウェイかどうかを判定
+                is_gateway = (ip == self.gateway_ip)
+                
+                # 接続情報を保持
+                connected_to = old_connections.get(ip, [])
+                
+                new_devices[ip] = Device(
+                    ip=ip,
+                    mac=mac,
+                    manufacturer=manufacturer,
+                    hostname=hostname,
+                    is_gateway=is_gateway,
+                    connected_to=connected_to
+                )
+            
+            with self.lock:
+                # デバイス情報を更新（公開済みのスナップショットを書き換えないよう、
+                # 引き継ぐデバイスはコピーした新しい辞書でトポロジーを推定する）
+                devices = {ip: device.model_copy() for ip, device in self.devices.items()}
+                devices.update(new_devices)
+                self.devices = devices
                 
                 # トポロジー推定（簡易版）
                 self._estimate_topology()
+                self._publish_devices(self.devices.values())
         finally:
             self.scanning = False
     
+    async def async_scan_network(self, ip_range="192.168.1.0/24"):
+        """指定したIP範囲をスキャン（イベントループをブロックしないようスレッドで実行）"""
+        await asyncio.to_thread(self.scan_network, ip_range)
+    
+    def close(self):
+        """スキャナーのリソースを解放（解放が必要なリソースはない）"""
+        pass
+    
     def _estimate_topology(self):
         """ネットワークトポロジーの推定（簡易実装）"""
         # ゲートウェイを識別
@@ -135,8 +163,3 @@ class NetworkScanner:
         
         thread = threading.Thread(target=scan_task, daemon=True)
         thread.start()
-        
-    def get_devices(self):
-        """スキャンされたデバイスのリストを返す"""
-        with self.lock:
-            return list(self.devices.values())
\ No newline at end of file
@@ -62,7 +62,22 @@ async def shutdown_event():
             logger.info("Broadcast task cancelled successfully")
         except Exception as e:
             logger.error(f"Error cancelling broadcast task: {e}")
+    
+    # スキャナーのスレッドプールを終了
+    scanner.close()
 
 if __name__ == "__main__":
+    import platform
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    
+    # WebSocket送信の多いワークロードのためuvloopを使用（Windowsでは未対応のため標準のasyncio）
+    loop = "asyncio" if platform.system() == "Windows" else "uvloop"
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        loop=loop,
+        http="httptools",
+        ws="websockets"
+    )
\ No newline at end of file
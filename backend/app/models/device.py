@@ -1,5 +1,5 @@
 # backend/app/models/device.py
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional, List
 
 class Device(BaseModel):
@@ -9,3 +9,6 @@ class Device(BaseModel):
     hostname: Optional[str] = None
     is_gateway: bool = False
     connected_to: List[str] = []
+
+# デバイスリストをまとめてシリアライズするためのアダプター
+DeviceListAdapter = TypeAdapter(List[Device])
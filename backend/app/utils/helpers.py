@@ -0,0 +1,20 @@
+# backend/app/utils/helpers.py
+
+def compute_device_delta(old_snapshot, new_snapshot):
+    """2つのデバイススナップショット（IP -> Device）の差分を計算
+    
+    変更が無い場合はNoneを返す
+    """
+    old_keys = old_snapshot.keys()
+    new_keys = new_snapshot.keys()
+    
+    added = [new_snapshot[ip] for ip in new_keys - old_keys]
+    removed = list(old_keys - new_keys)
+    changed = [
+        new_snapshot[ip] for ip in new_keys & old_keys
+        if new_snapshot[ip] != old_snapshot[ip]
+    ]
+    
+    if not (added or removed or changed):
+        return None
+    return {"added": added, "removed": removed, "changed": changed}
@@ -1,11 +1,14 @@
 // frontend/src/hooks/useWebSocket.ts
 import { useState, useEffect, useCallback, useRef } from 'react';
-import { Device } from '../types/types';
+import { Device, DeviceMessage } from '../types/types';
 import { fetchDevices } from '../services/api';
 
 // 開発環境の判定
 const isDevelopment = import.meta.env.DEV;
 
+// バイナリフレームのデコード用
+const textDecoder = new TextDecoder();
+
 export const useWebSocket = () => {
   const [devices, setDevices] = useState<Device[]>([]);
   const [connected, setConnected] = useState(false);
@@ -114,6 +117,8 @@ export const useWebSocket = () => {
     try {
       console.log('Attempting to connect to WebSocket...');
       const ws = new WebSocket('ws://localhost:8000/api/ws');
+      // サーバーはシリアライズ済みのJSONをバイナリフレームで送信する
+      ws.binaryType = 'arraybuffer';
       socketRef.current = ws;
       
       // 接続タイムアウトを設定
@@ -136,20 +141,29 @@ export const useWebSocket = () => {
         console.log('WebSocket connected');
         setConnected(true);
         reconnectAttemptsRef.current = 0; // 成功したらリセット
-        
-        // 接続後にデバイスデータをリクエスト
-        ws.send('get_devices');
+        // 接続直後にサーバーからスナップショットが送信される
       };
       
       ws.onmessage = (event) => {
         if (!isComponentMountedRef.current) return;
         
         try {
-          const data = JSON.parse(event.data);
-          if (Array.isArray(data)) {
-            setDevices(data);
+          const text = typeof event.data === 'string'
+            ? event.data
+            : textDecoder.decode(event.data);
+          const data: DeviceMessage = JSON.parse(text);
+          if (data.op === 'snapshot') {
+            setDevices(data.devices);
+          } else if (data.op === 'delta') {
+            // 差分を現在のデバイスリストに適用
+            setDevices(prev => {
+              const devicesByIp = new Map(prev.map(device => [device.ip, device]));
+              data.removed.forEach(ip => devicesByIp.delete(ip));
+              [...data.added, ...data.changed].forEach(device => devicesByIp.set(device.ip, device));
+              return Array.from(devicesByIp.values());
+            });
           } else {
-            console.warn('Received non-array data from WebSocket:', data);
+            console.warn('Received unknown message from WebSocket:', data);
           }
         } catch (error) {
           console.error('Failed to parse WebSocket data:', error);
@@ -204,7 +218,8 @@ export const useWebSocket = () => {
   
   const requestUpdate = useCallback(() => {
     if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
-      socketRef.current.send('get_devices');
+      // WebSocketはサーバーからのプッシュ専用のため、最新の一覧はHTTPで取得
+      fetchDevicesWithFallback();
       return true;
     } else {
       console.log('Cannot request update - WebSocket is not connected');
@@ -214,7 +229,7 @@ export const useWebSocket = () => {
       }
       return false;
     }
-  }, [connect]);
+  }, [connect, fetchDevicesWithFallback]);
   
   // コンポーネントのマウント時に接続
   useEffect(() => {
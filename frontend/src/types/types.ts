@@ -6,4 +6,9 @@ export interface Device {
     hostname: string | null;
     is_gateway: boolean;
     connected_to: string[];
-  }
\ No newline at end of file
+  }
+
+// WebSocketで受信するメッセージ
+export type DeviceMessage =
+  | { op: 'snapshot'; devices: Device[] }
+  | { op: 'delta'; added: Device[]; removed: string[]; changed: Device[] };